@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import statistics
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+from const import fields_dict, data_types
+from lead_store import LeadStore
+from processing import (
+    accumulate_rows, group_masterdata, decode_masterdata,
+    sanitize_newlines, write_leads_csv, write_results_csv
+)
+
+# Free text report fields, filled with multi-line values to exercise the newline sanitization
+TEXT_FIELDS = ['Remarks', 'StatusComment', 'Comments']
+
+# Domain the synthetic leads are stored under
+BENCHMARK_DOMAIN = "benchmark.example.com"
+
+def make_masterdata(master_items):
+    """
+    Generate a raw MasterData/all response with the keys and value types of data_types.
+    """
+    samples = {str: "dd-MMM-yyyy", int: 100, bool: False, dict: {}, None: None}
+    data = {}
+    for key, value_type in data_types.items():
+        if value_type is list:
+            data[key] = [{"id": item_id, "name": f"{key} {item_id}"} for item_id in range(1, master_items + 1)]
+        else:
+            data[key] = samples[value_type]
+    return data
+
+def make_report_pages(leads, page_size, master_items, rng):
+    """
+    Generate drillDownData reportData pages with the fields of fields_dict.
+    """
+    pages = []
+    for start in range(0, leads, page_size):
+        page = []
+        for lead_id in range(start + 1, min(start + page_size, leads) + 1):
+            row = {}
+            for field, master_key in fields_dict.items():
+                if master_key:
+                    # Some leads carry several comma separated master data ids
+                    ids = rng.sample(range(1, master_items + 1), k=rng.choice((1, 1, 1, 2)))
+                    row[field] = ", ".join(str(item_id) for item_id in ids)
+                elif field in TEXT_FIELDS:
+                    row[field] = f"Called on {rng.randint(1, 28)}th\r\nAsked to follow up\nin {rng.randint(1, 9)} days"
+                else:
+                    row[field] = f"{field.lower()}-{lead_id}"
+            row['Id'] = lead_id
+            row['MobileNumber'] = str(9000000000 + lead_id)
+            row['Email'] = f"lead{lead_id}@example.com"
+            page.append(row)
+        pages.append(page)
+    return pages
+
+def measure(stage, make_input, repeat, min_time):
+    """
+    Return the median wall time in seconds and the peak traced memory in MB of a stage.
+    The stage is timed at least repeat times and until the timed runs add up to min_time seconds,
+    so that fast stages are not judged on a single noisy run. The memory is measured in a
+    separate pass because tracing slows the stage down.
+    """
+    timings = []
+    while len(timings) < repeat or sum(timings) < min_time:
+        stage_input = make_input()
+        start = time.perf_counter()
+        stage(stage_input)
+        timings.append(time.perf_counter() - start)
+
+    stage_input = make_input()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    current, _ = tracemalloc.get_traced_memory()
+    stage(stage_input)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return statistics.median(timings), (peak - current) / (1024 * 1024)
+
+def run_benchmarks(leads, page_size, master_items, repeat, min_time, seed=0):
+    rng = random.Random(seed)
+    pages = make_report_pages(leads, page_size, master_items, rng)
+    raw_masterdata = make_masterdata(master_items)
+
+    def accumulate(pages):
+        all_rows = pd.DataFrame()
+        for page in pages:
+            all_rows = accumulate_rows(all_rows, page)
+        return all_rows
+
+    all_rows = accumulate(pages)
+    masterdata = group_masterdata(raw_masterdata)
+    decoded = decode_masterdata(all_rows.copy(), masterdata, fields_dict)
+    sanitized = sanitize_newlines(decoded)
+    headers = {field: field.upper() for field in sanitized.columns}
+
+    with tempfile.TemporaryDirectory() as folder:
+        store_paths = (os.path.join(folder, f"leads-{run}.db") for run in itertools.count())
+
+        def upsert(lead_store):
+            # One transaction per drillDownData page, as the scraper writes them
+            for page in pages:
+                lead_store.upsert_leads(BENCHMARK_DOMAIN, page)
+            return lead_store
+
+        filled_store = upsert(LeadStore(os.path.join(folder, "filled.db")))
+
+        stages = {
+            "upsert_leads": (lambda lead_store: upsert(lead_store).close(), lambda: LeadStore(next(store_paths))),
+            "load_leads": (lambda lead_store: pd.DataFrame(lead_store.load_leads(BENCHMARK_DOMAIN)), lambda: filled_store),
+            "accumulate_rows": (accumulate, lambda: pages),
+            "group_masterdata": (group_masterdata, lambda: raw_masterdata),
+            "decode_masterdata": (lambda rows: decode_masterdata(rows, masterdata, fields_dict), lambda: all_rows.copy()),
+            "sanitize_newlines": (sanitize_newlines, lambda: decoded),
+            "write_leads_csv": (lambda rows: write_leads_csv(rows, headers, os.path.join(folder, "leads.csv")), lambda: sanitized),
+            "write_results_csv": (lambda rows: write_results_csv(rows, os.path.join(folder, "results.csv")), lambda: sanitized),
+        }
+
+        results = {}
+        for name, (stage, make_input) in stages.items():
+            seconds, peak_mb = measure(stage, make_input, repeat, min_time)
+            results[name] = {"seconds": seconds, "peak_mb": peak_mb}
+        filled_store.close()
+    return results
+
+def compare(results, baseline, tolerance, min_seconds, min_mb):
+    """
+    Print the results next to the baseline and return the names of the regressed stages.
+    A stage only regresses when it is past the relative tolerance and also slower by more than
+    min_seconds or larger by more than min_mb, so sub-millisecond jitter can't fail the run.
+    """
+    regressions = []
+    print(f"{'stage':<20}{'seconds':>10}{'peak MB':>10}{'base s':>10}{'base MB':>10}  status")
+    for name, result in results.items():
+        base = baseline.get(name)
+        status = "no baseline"
+        if base:
+            slower = (result["seconds"] > base["seconds"] * (1 + tolerance) and
+                      result["seconds"] - base["seconds"] > min_seconds)
+            larger = (result["peak_mb"] > base["peak_mb"] * (1 + tolerance) and
+                      result["peak_mb"] - base["peak_mb"] > min_mb)
+            status = "REGRESSED" if slower or larger else "ok"
+            if slower or larger:
+                regressions.append(name)
+        print(
+            f"{name:<20}{result['seconds']:>10.4f}{result['peak_mb']:>10.2f}"
+            f"{base['seconds'] if base else float('nan'):>10.4f}{base['peak_mb'] if base else float('nan'):>10.2f}  {status}"
+        )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the lead data-processing stages on synthetic data.")
+    parser.add_argument("--leads", type=int, default=20000, help="Number of synthetic leads")
+    parser.add_argument("--page-size", type=int, default=1000, help="Leads per drillDownData page")
+    parser.add_argument("--master-items", type=int, default=200, help="Items per master data list")
+    parser.add_argument("--repeat", type=int, default=5, help="Minimum timed runs per stage, the median is kept")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Minimum total seconds each stage is timed for")
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="Stored baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline for this scale")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown or memory growth over the baseline")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Slowdowns up to this many seconds never regress")
+    parser.add_argument("--min-mb", type=float, default=1.0, help="Memory growth up to this many MB never regresses")
+    args = parser.parse_args(argv)
+
+    scale = f"leads={args.leads},page_size={args.page_size},master_items={args.master_items}"
+    print(f"Benchmarking {scale}...")
+    results = run_benchmarks(args.leads, args.page_size, args.master_items, args.repeat, args.min_time)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baselines = json.load(f)
+
+    regressions = compare(results, baselines.get(scale, {}), args.tolerance, args.min_seconds, args.min_mb)
+
+    if args.save_baseline:
+        baselines[scale] = results
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=4)
+        print(f"Baseline saved to {args.baseline}.")
+        return 0
+
+    if regressions:
+        print(f"Regressed past the baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
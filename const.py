@@ -205,4 +205,16 @@ data_types = {
     "pinCodes": None
 }
 
-["leadSources", ]
\ No newline at end of file
+["leadSources", ]
+
+# Keys of the drillDownData request body that the sharded fetch rewrites for every
+# Createdon date range and page, and the date format the report API expects. The
+# open-ended first range sends a null from date.
+drilldown_shard_keys = {
+    "page_number": "pageNumber",
+    "page_size": "pageSize",
+    "from_date": "fromDate",
+    "to_date": "toDate",
+}
+drilldown_first_page = 1
+drilldown_date_format = "%Y-%m-%d"
@@ -0,0 +1,125 @@
+import csv
+import json
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Report fields that are copied into their own indexed columns, the full row is kept as JSON
+INDEXED_FIELDS = {
+    "MobileNumber": "mobile_number",
+    "Email": "email",
+    "UpdatedOn": "updated_on",
+    "StatusId": "status_id",
+}
+
+class LeadStore:
+
+    def __init__(self, db_path: str = "leads.db"):
+        """
+        Open (or create) the local SQLite lead store at the given path. The connection is shared
+        by the worker threads the scrapers offload writes to, so every call holds the store lock.
+        Leads are keyed by (domain, Id) so that every run and every client upserts into the same table.
+        """
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema()
+
+    def create_schema(self):
+        """
+        Create the leads table and its lookup indexes if they don't exist yet.
+        """
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS leads (
+                    domain TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    mobile_number TEXT,
+                    email TEXT,
+                    updated_on TEXT,
+                    status_id TEXT,
+                    data TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    PRIMARY KEY (domain, id)
+                )
+            """)
+            for column in INDEXED_FIELDS.values():
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS idx_leads_{column} ON leads ({column})")
+
+    def upsert_leads(self, domain: str, report_data: list) -> int:
+        """
+        Insert or update a page of reportData rows for the given domain in a single transaction.
+        Returns the number of rows written.
+        """
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        records = []
+        for row in report_data:
+            if row.get("Id") is None:
+                continue
+            records.append((
+                domain,
+                str(row["Id"]),
+                *(None if row.get(field) is None else str(row.get(field)) for field in INDEXED_FIELDS),
+                json.dumps(row, ensure_ascii=False),
+                fetched_at,
+            ))
+
+        if len(records) != len(report_data):
+            logger.warning(f"Skipped {len(report_data) - len(records)} rows without an Id for {domain}.")
+
+        with self.lock, self.connection:
+            self.connection.executemany("""
+                INSERT INTO leads (domain, id, mobile_number, email, updated_on, status_id, data, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (domain, id) DO UPDATE SET
+                    mobile_number = excluded.mobile_number,
+                    email = excluded.email,
+                    updated_on = excluded.updated_on,
+                    status_id = excluded.status_id,
+                    data = excluded.data,
+                    fetched_at = excluded.fetched_at
+            """, records)
+        return len(records)
+
+    def load_leads(self, domain: str, fetched_since: str = None) -> list:
+        """
+        Return the stored leads of the given domain as a list of reportData dicts, only the ones
+        fetched at or after the fetched_since ISO timestamp if it is given.
+        """
+        with self.lock:
+            if fetched_since is None:
+                cursor = self.connection.execute("SELECT data FROM leads WHERE domain = ? ORDER BY rowid", (domain,))
+            else:
+                cursor = self.connection.execute(
+                    "SELECT data FROM leads WHERE domain = ? AND fetched_at >= ? ORDER BY rowid", (domain, fetched_since)
+                )
+            return [json.loads(data) for (data,) in cursor]
+
+    def count_leads(self, domain: str) -> int:
+        """
+        Return the number of stored leads of the given domain.
+        """
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM leads WHERE domain = ?", (domain,)).fetchone()[0]
+
+    def export_csv(self, domain: str, file_path: str) -> int:
+        """
+        Write the raw stored leads of the given domain to a CSV file, with the report keys as column
+        names and the master data ids as stored. Returns the number of rows written.
+        """
+        rows = self.load_leads(domain)
+        fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+
+        with open(file_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, quoting=csv.QUOTE_ALL)
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
+
+    def close(self):
+        self.connection.close()
@@ -1,36 +1,80 @@
-import csv
 import os
+import sys
+import copy
 import re
+import math
 import json
 import asyncio
-import pandas as pd
+import argparse
+from urllib.parse import urlparse
 from datetime import datetime, timedelta, timezone
 
-from playwright.async_api import async_playwright, expect
-import requests
+# pandas, playwright and requests are slow to import, so they are imported inside the
+# methods that need them and listing or dry-run commands never load them
 from otp_email_fetcher import get_panel_otp
+from lead_store import LeadStore
+from scheduler import RunHistory, DomainLimiter, plan_schedule, registrable_domain
+from roster import load_clients
 
 from logger_config import setup_logger, TRACE_LEVEL
 from const import *
 logger = setup_logger(log_level=TRACE_LEVEL)
 
+# Only the requests matching these patterns are routed to Python, every other request and
+# response of the page stays inside the browser
+MASTERDATA_URL_PATTERN = re.compile(r"api/MasterData/all")
+DRILLDOWN_URL_PATTERN = re.compile(r"api/reports/drillDownData")
+
+# Chromium performance metrics recorded per client page, durations are in seconds
+PAGE_METRICS = ("TaskDuration", "ScriptDuration", "LayoutDuration", "RecalcStyleDuration", "JSHeapUsedSize", "Nodes")
+
+# Seconds between two page metrics samples while a client is paginated
+METRICS_INTERVAL = 2
+
 class ReportScraper:
 
     admin_email: str = None
     admin_password: str = None
 
-    def __init__(self, file_path: str, output_folder: str = "output", max_leads_per_request: int = 500, headless: bool = True):
+    def __init__(self, file_path: str, output_folder: str = "output", max_leads_per_request: int = 500, headless: bool = True,
+                 stall_timeout: int = 30, max_stall_retries: int = 2, store_path: str = "leads.db",
+                 workers: int = 1, domain_concurrency: int = 4, domain_requests_per_second: float = 8.0,
+                 history_path: str = "run_history.json", results_folder: str = "results", clients: list = None,
+                 render_free: bool = False, shard_threshold: int = 0, shards: int = 8, shard_concurrency: int = 4,
+                 shard_start_date: str = "2015-01-01", shard_retries: int = 2):
         """
         Initialize the ReportScraper with the given file path and output folder.
         Additionally, set the maximum number of leads to fetch per request and the headless mode.
-        We also initialize the clients DataFrame and the all_rows DataFrame to store the fetched leads.
+        The clients are read from the cached roster of the file unless a list of client rows is given,
+        and the all_rows DataFrame of every worker stores the fetched leads.
+
+        The stall_timeout (in seconds) is how long the pagination watchdog waits for a new
+        drillDownData page before reloading the report, and max_stall_retries is the number
+        of reloads allowed per stage before the client is given up on.
+
+        Every fetched page is upserted into the local lead store at store_path, and the CSV
+        exports are generated from the store.
+
+        Clients are processed by the given number of workers, longest first according to the
+        run history at history_path. Tenants are subdomains of a shared CRM backend, so the
+        limits apply per registrable domain: at most domain_concurrency clients at once and
+        domain_requests_per_second API requests across all of them.
+
+        In render_free mode the grid headers are read once and the grid body is hidden, so the
+        browser no longer lays out and paints the lead rows it receives on every page.
+
+        Clients with more than shard_threshold leads (0 disables sharding) are fetched as the
+        given number of Createdon date ranges from shard_start_date until today, after an
+        open-ended range for the older leads, shard_concurrency of them at once, by replaying the
+        grid's drillDownData request in the same context. Ranges that still return full pages are
+        halved, and a failed range is retried up to shard_retries times.
 
         """
 
         logger.info("Initializing ReportScraper...")
         
-        self.clients = pd.read_excel(file_path)
-        self.all_rows = pd.DataFrame()
+        self.clients = clients if clients is not None else load_clients(file_path)
+        self.all_rows = None  # Created by reset_client_state for every worker
         self.panel_url = None
         self.masterdata_url = None
         self.masterdata_all = dict()
@@ -42,15 +86,42 @@ class ReportScraper:
         self.headless = headless
         self.max_leads_per_request = max_leads_per_request
         self.is_scraping_complete = asyncio.Event()
-        
-        # Create the output folder if it doesn't exist
+        self.render_free = render_free
+        self.grid_headers = {}
+        self.browser_session = None  # Browser CDP session of the worker, opened on the first metrics sample
+        self.metrics_task = None
+        self.peak_metrics = {}
+
+        # Sharded fetching of the large clients
+        self.shard_threshold = shard_threshold
+        self.shards = shards
+        self.shard_concurrency = shard_concurrency
+        self.shard_start_date = datetime.strptime(shard_start_date, "%Y-%m-%d")
+        self.shard_retries = shard_retries
+        self.sharded = False
+        self.shard_task = None
+
+        # Pagination watchdog state, reset for every client
+        self.stall_timeout = stall_timeout
+        self.max_stall_retries = max_stall_retries
+        self.pages_received = 0
+        self.last_progress_time = None
+        self.stall_retries = {}
+        self.fast_forward_pages = 0
+        self.watchdog_task = None
+        self.prepare_task = None
+        self.fetch_start = None  # Leads upserted since then belong to the current client's run
+
+        # The lead store is opened and the output folders are created when the run starts
+        self.store_path = store_path
+        self.lead_store = None
         self.output_folder = output_folder
-        os.makedirs(self.output_folder, exist_ok=True)
+        self.output_folder_results = results_folder
 
-        self.output_folder_results = "results"
-        os.makedirs(self.output_folder_results, exist_ok=True)
-
-        logger.info(f"Output folder created at: {self.output_folder}")
+        # Scheduling state shared by all the workers
+        self.workers = workers
+        self.history = RunHistory(history_path)
+        self.limiter = DomainLimiter(domain_concurrency, domain_requests_per_second)
 
     async def wait_for_selectors(self, page, selectors, timeout=30000):
         """
@@ -124,51 +195,90 @@ class ReportScraper:
         logger.error("Max retries reached. Exiting.")
         return False
     
-    async def handle_request(self, request):
+    async def handle_request(self, route):
         """
-        Handle the request to capture the master data URL.
+        Handle the routed master data request to capture its URL, then let it through.
         """
-        if "api/MasterData/all" in request.url:
-            self.masterdata_url = request.url
-            logger.info(self.masterdata_url)
-            self.page.remove_listener("request", self.handle_request)
-            self.is_scraping_complete.set()
-
-    async def handle_response(self, response):
+        if self.masterdata_url:
+            await route.fallback()
+            return
+
+        self.masterdata_url = route.request.url
+        logger.info(self.masterdata_url)
+        await self.throttle_api(self.masterdata_url)
+        await route.fallback()
+        await self.page.unroute(MASTERDATA_URL_PATTERN, self.handle_request)
+        self.is_scraping_complete.set()
+
+    async def handle_response(self, route):
         """
-        Handle the response to capture the lead data.
+        Handle the routed drillDownData request: fetch it, hand the response back to the grid
+        and capture the lead data from the body.
         """
+        from processing import accumulate_rows
+
+        # Pages replayed while a reloaded report fast-forwards were already received, they are
+        # let through without being parsed or stored and only count as progress for the watchdog
+        if self.fast_forward_pages > 0:
+            self.fast_forward_pages -= 1
+            self.last_progress_time = asyncio.get_running_loop().time()
+            await self.throttle_api(route.request.url)
+            await route.fallback()
+            return
+
         try:
+            await self.throttle_api(route.request.url)
+            response = await route.fetch()
+        except Exception as e:
+            logger.error(f"Error fetching drillDownData: {e}")
+            await route.fallback()
+            return
+
+        # The first drillDownData request of a sharded client is the template of the shard requests
+        if self.sharded and self.shard_task is None:
+            template = {
+                "url": route.request.url,
+                "headers": await route.request.all_headers(),
+                "post_data": route.request.post_data
+            }
+            self.shard_task = asyncio.create_task(self.fetch_shards(template))
+
+        try:
+            # Without a body the driver hands the fetched body back as is, it is only read for parsing
+            await route.fulfill(response=response)
+            body = await response.body()
             logger.debug(f"Received response: {response.url} with status {response.status}")
 
             if (response.status == 200 and
-                response.headers.get("content-type", "").startswith("application/json") and
-                "api/reports/drillDownData" in response.url
+                response.headers.get("content-type", "").startswith("application/json")
             ):
-                body = await response.body()
                 json_data = await asyncio.to_thread(json.loads, body.decode("utf-8"))
 
                 report_data = json_data.get("data", {}).get("reportData", [])
                 
                 if report_data and self.all_rows.shape[0] != self.total_lead:
-                    new_rows = pd.DataFrame(report_data)
-                    
+                    # Upsert the whole page into the lead store in a single transaction
+                    await asyncio.to_thread(self.lead_store.upsert_leads, self.domain().lower(), report_data)
+
+                    previous_count = self.all_rows.shape[0]
+
                     # Concatenate new rows and drop duplicates if any exist
-                    self.all_rows = pd.concat([self.all_rows, new_rows], ignore_index=True).drop_duplicates()
+                    self.all_rows = accumulate_rows(self.all_rows, report_data)
+
+                    # Only pages that added leads move the watchdog to its next stage
+                    if self.all_rows.shape[0] > previous_count:
+                        self.pages_received += 1
+                        self.last_progress_time = asyncio.get_running_loop().time()
 
                     logger.info(f"Total unique leads fetched: {self.all_rows.shape[0]}/{self.total_lead}")
-                    logger.trace(f"Fetched rows: {new_rows}")  # Log newly fetched rows
+                    logger.trace(f"Fetched rows: {report_data}")  # Log newly fetched rows
                 else:
                     logger.info("No more leads to fetch or already fetched all leads. Exiting...")
-            
-            if response.status == 200 and "api/MasterData/all" in response.url:
-                self.masterdata_url = response.url
-                print(self.masterdata_url)
 
             if self.total_lead == self.all_rows.shape[0]:
-                logger.info("Total leads count reached. Removing response listener.")
-                self.page.remove_listener("response", self.handle_response)
-                await self.save_leads(self.domain().lower() + "_leads.csv")
+                logger.info("Total leads count reached. Removing drillDownData route.")
+                await self.page.unroute(DRILLDOWN_URL_PATTERN, self.handle_response)
+                self.client_completed = await self.save_leads(self.domain().lower() + "_leads.csv")
 
                 self.is_scraping_complete.set()
                 logger.info("Scraping complete. Leads saved.")
@@ -177,17 +287,192 @@ class ReportScraper:
         except Exception as e:
             logger.error(f"Error retrieving response body: {e}")
             self.is_scraping_complete.set()
+        finally:
+            # The driver keeps every fetched body until the context closes unless it is disposed
+            await response.dispose()
 
 
+    def date_partitions(self):
+        """
+        Split the Createdon range from shard_start_date until tomorrow into equal whole-day ranges,
+        preceded by an open-ended range (from_date None) for the leads created before it.
+        Adjacent ranges share their boundary day, the overlap is removed when merging by Id.
+        """
+        shards = max(self.shards, 1)
+        end_date = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(days=1)
+        days = (end_date - self.shard_start_date).days
+        boundaries = [self.shard_start_date + timedelta(days=days * index // shards) for index in range(shards + 1)]
+        return [(None, self.shard_start_date)] + list(zip(boundaries, boundaries[1:]))
+
+    @staticmethod
+    def split_partition(from_date, to_date):
+        """
+        Halve a date range at a whole day, or return an empty list when the range is open-ended
+        or too short to be split.
+        """
+        if from_date is None or (to_date - from_date).days < 2:
+            return []
+        middle = from_date + timedelta(days=(to_date - from_date).days // 2)
+        return [(from_date, middle), (middle, to_date)]
+
+    @staticmethod
+    def partition_label(from_date, to_date) -> str:
+        start = "the start" if from_date is None else f"{from_date:%Y-%m-%d}"
+        return f"{start} to {to_date:%Y-%m-%d}"
+
+    async def fetch_shard(self, template, from_date, to_date):
+        """
+        Fetch the pages of one Createdon date range by replaying the template request. When the
+        first page is full and the range can be halved, the halves are returned to be fetched
+        instead of the following pages, so that the ranges follow the lead density.
+        Returns the fetched rows and the halves.
+        """
+        # Headers that the request context sets itself
+        headers = {
+            key: value for key, value in template["headers"].items()
+            if not key.startswith(":") and key not in ("content-length", "host")
+        }
+        keys = drilldown_shard_keys
+        label = self.partition_label(from_date, to_date)
+        rows = []
+        seen_ids = set()
+
+        # A range can't have more pages than the whole client, which bounds an API that ignores the page number
+        max_pages = max(math.ceil(self.total_lead / self.max_leads_per_request), 1)
+        for page_number in range(drilldown_first_page, drilldown_first_page + max_pages):
+            body = json.loads(template["post_data"])
+            body[keys["page_number"]] = page_number
+            body[keys["page_size"]] = self.max_leads_per_request
+            body[keys["from_date"]] = from_date.strftime(drilldown_date_format) if from_date else None
+            body[keys["to_date"]] = to_date.strftime(drilldown_date_format)
+
+            await self.throttle_api(template["url"])
+            response = await self.context.request.post(template["url"], headers=headers, data=json.dumps(body))
+            try:
+                if not response.ok:
+                    raise RuntimeError(f"drillDownData returned {response.status} for page {page_number}")
+                response_body = await response.body()
+            finally:
+                # The driver keeps every fetched body until the context closes unless it is disposed
+                await response.dispose()
+
+            json_data = json.loads(response_body)
+            report_data = json_data.get("data", {}).get("reportData", [])
+
+            page_ids = {row.get("Id") for row in report_data}
+            if report_data and page_ids <= seen_ids:
+                raise RuntimeError(f"page {page_number} only repeats leads of the previous pages")
+            seen_ids |= page_ids
+
+            if report_data:
+                # Upsert every shard page into the lead store in a single transaction
+                await asyncio.to_thread(self.lead_store.upsert_leads, self.domain().lower(), report_data)
+                rows.extend(report_data)
+                self.pages_received += 1
+                self.last_progress_time = asyncio.get_running_loop().time()
+
+            if len(report_data) < self.max_leads_per_request:
+                break
+
+            if page_number == drilldown_first_page and (halves := self.split_partition(from_date, to_date)):
+                logger.debug(f"Shard {label} returned a full page, halving it.")
+                return rows, halves
+        else:
+            logger.warning(f"Shard {label} stopped at the {max_pages} page limit.")
+
+        logger.info(f"Shard {label}: {len(rows)} leads in {page_number} pages.")
+        return rows, []
+
+    async def fetch_shards(self, template):
+        """
+        Fetch the date range shards, shard_concurrency at once, halving the dense ones and retrying
+        the failed ones, then merge them by Id and check the result against the dashboard total.
+        """
+        from processing import merge_shards
+
+        try:
+            json.loads(template["post_data"] or "")
+        except ValueError:
+            logger.warning("The drillDownData request has no JSON body to shard, falling back to pagination.")
+            await self.page.evaluate(self.auto_next_page_script())
+            return
+
+        partitions = self.date_partitions()
+        logger.info(f"Fetching {self.total_lead} leads as {len(partitions)} date range shards, {self.shard_concurrency} at once.")
+
+        queue = asyncio.Queue()
+        for partition in partitions:
+            queue.put_nowait((partition, 0))
+        shard_rows = []
+        failed = []
+
+        async def fetch_partitions():
+            while True:
+                (from_date, to_date), attempt = await queue.get()
+                label = self.partition_label(from_date, to_date)
+                try:
+                    rows, halves = await self.fetch_shard(template, from_date, to_date)
+                    shard_rows.append(rows)
+                    for half in halves:
+                        queue.put_nowait((half, 0))
+                except Exception as e:
+                    if attempt < self.shard_retries:
+                        logger.warning(f"Shard {label} failed, retrying ({attempt + 1}/{self.shard_retries}): {e}")
+                        await asyncio.sleep(2 ** attempt)
+                        queue.put_nowait(((from_date, to_date), attempt + 1))
+                    else:
+                        logger.error(f"Shard {label} failed: {e}")
+                        failed.append(label)
+                finally:
+                    queue.task_done()
+
+        fetchers = [asyncio.create_task(fetch_partitions()) for _ in range(max(self.shard_concurrency, 1))]
+        try:
+            await queue.join()
+        finally:
+            for fetcher in fetchers:
+                fetcher.cancel()
+
+        # Checked before save_leads, which replaces all_rows with the leads loaded from the store
+        merged = merge_shards(shard_rows)
+        self.all_rows = merged
+        shard_sum = sum(len(rows) for rows in shard_rows)
+        logger.info(
+            f"Shards returned {shard_sum} rows in {len(shard_rows)} ranges, {len(merged)} unique leads, "
+            f"dashboard total: {self.total_lead}"
+        )
+        complete = not failed and shard_sum >= self.total_lead and len(merged) >= self.total_lead
+
+        await self.page.unroute(DRILLDOWN_URL_PATTERN, self.handle_response)
+        saved = await self.save_leads(self.domain().lower() + "_leads.csv")
+
+        # An incomplete client keeps its leads but isn't recorded as finished
+        if not complete:
+            logger.error(
+                f"Sharded fetch of {self.client_name} is incomplete: {len(merged)}/{self.total_lead} leads, "
+                f"failed shards: {', '.join(failed) or 'none'}."
+            )
+        else:
+            self.client_completed = saved
+            logger.info("Sharded scraping complete. Leads saved.")
+        self.is_scraping_complete.set()
+
     def domain(self) -> str:
         """
         Extract the domain from the panel URL.
         """
+        return self.panel_domain(self.panel_url)
+
+    @staticmethod
+    def panel_domain(panel_url) -> str:
+        """
+        Extract the domain from the given panel URL.
+        """
         pattern = r"(?:https?://)?(?:www\.)?([^:/\n?]+)"
-        match = re.match(pattern, self.panel_url)
+        match = re.match(pattern, panel_url)
         
         if match:
-            logger.debug(f"Extracted domain: {match.group(1)} from panel URL: {self.panel_url}")
+            logger.debug(f"Extracted domain: {match.group(1)} from panel URL: {panel_url}")
             return match.group(1)
         
         logger.warning("No domain found in panel URL.")
@@ -197,25 +482,18 @@ class ReportScraper:
         """
         Fetch and group the master data from the captured URL.
         """
-        data = requests.get(self.masterdata_url).json()
-        grouped_data = {}
-        for key, value in data.items():
-            str_key = str(key)
-            if isinstance(value, list):
-                grouped_data[str_key] = {}
-                for item in value:
-                    if isinstance(item, dict):
-                        grouped_data[str_key][str(item.get("id"))] = str(item.get("name"))
-                    else:
-                        grouped_data[str_key][str(item)] = None  # Convert item to string
-            else:
-                grouped_data[str_key] = str(value)
-        return grouped_data
+        import requests
+        from processing import group_masterdata
+
+        return group_masterdata(requests.get(self.masterdata_url).json())
 
     async def save_leads(self, file_name):
         """
-        Save the leads to a CSV file.
+        Save the leads to a CSV file. Returns whether both CSV files were written.
         """
+        import pandas as pd
+        from processing import decode_masterdata, sanitize_newlines, write_leads_csv, write_results_csv
+
         masterdata = self.map_masterdata()
 
         if not os.path.exists("master"):
@@ -223,22 +501,17 @@ class ReportScraper:
         with open(f"master/masterdata_{self.domain().lower()}.json", "w") as f:
             json.dump(masterdata, f, indent=4)
 
-        # If the total leads per request is equal to the total leads, wait for 2 seconds
-        # to ensure headers are loaded before extracting them
-
-        if self.max_leads_per_request <= self.total_lead:
-            await self.page.wait_for_timeout(2000)
+        # The headers are already read when the grid was made render-free
+        if self.grid_headers:
+            data = self.grid_headers
+        else:
+            # If the total leads per request is equal to the total leads, wait for 2 seconds
+            # to ensure headers are loaded before extracting them
 
-        data = {}
-        headers = await self.page.query_selector_all('.ag-header-cell')
-        for header in headers:
-            col_id = await header.get_attribute('col-id')
-            header_text = await header.query_selector('span[ref="eText"]')
-            if header_text:
-                header_text = await header_text.inner_text()
+            if self.max_leads_per_request <= self.total_lead:
+                await self.page.wait_for_timeout(2000)
 
-            if col_id and header_text:
-                data[col_id] = header_text
+            data = await self.read_grid_headers()
         logger.debug(f"Data: {data}")
         
         # We need to map the fields to the corresponding master data
@@ -249,63 +522,49 @@ class ReportScraper:
         # handle the mapping, we will use the fields_dict to map the fields.
 
         _map_fields = fields_dict
-        for key in self.all_rows.columns:
-            self.all_rows[key] = self.all_rows[key].astype(str)
-        
-        for index, row in self.all_rows.iterrows():
-            for key, value in row.items():
-                if apiKey := _map_fields.get(key):
-                    master_value = masterdata.get(apiKey)
-                    if master_value is not None:
-                        ids = [id.strip() for id in str(value).split(',') if id.strip()]
-                        corresponding_values = []
-                        for id in ids:
-                            master_val = master_value.get(id)
-                            if master_val is not None:
-                                corresponding_values.append(master_val)
-                        result = ', '.join(corresponding_values)
-                        if result:
-                            self.all_rows.at[index, key] = result
-
-        for column in self.all_rows.columns:
-            if column in masterdata:
-                self.all_rows[column] = self.all_rows[column].map(masterdata[column])
+
+        # The export is generated from the leads this run upserted into the store, the leads of earlier
+        # runs that were not fetched again (deleted or reassigned in the CRM) are only in --export
+        self.all_rows = pd.DataFrame(
+            await asyncio.to_thread(self.lead_store.load_leads, self.domain().lower(), self.fetch_start)
+        )
+        self.all_rows = decode_masterdata(self.all_rows, masterdata, _map_fields)
 
         full_file_path = os.path.join(self.output_folder, file_name)
         logger.info(f"Saving leads to {full_file_path}...")
 
         try:
-            self.all_rows = self.all_rows.apply(
-                lambda x: x.map(
-                    lambda y: str(y).replace('\r\n', '\\n').replace('\r', '\\n').replace('\n', '\\n') if isinstance(y, str) else y
-                )
-            )
-            self.prev_headers = self.all_rows.columns.copy()
-
-            self.all_rows.columns = data.values()
-            self.all_rows.to_csv(full_file_path, index=False, quoting=csv.QUOTE_ALL, encoding='utf-8')
+            self.all_rows = sanitize_newlines(self.all_rows)
+            write_leads_csv(self.all_rows, data, full_file_path)
             logger.info("Leads successfully saved as CSV to output folder.")
 
             ############################################################################################################
             # The following code is for saving the leads to results folder after modification of the fields and values #
             ############################################################################################################
 
-            self.all_rows.columns = self.prev_headers
-            
-            cols_to_select = ['super_camp_id', 'Mobile', 'Email', 'feedback_id', 'comment']
-
-            self.all_rows['feedback_id'] = ''
-            self.all_rows['comment'] = ''
-            self.all_rows['super_camp_id'] = ''
-            self.all_rows.rename(columns={'MobileNumber': 'Mobile'}, inplace=True)
-
-            # Only selecting the cols_to_select columns
-            self.all_rows = self.all_rows[cols_to_select]
-            self.all_rows.to_csv(os.path.join(self.output_folder_results, file_name), index=False, quoting=csv.QUOTE_ALL, encoding='utf-8')
+            self.all_rows = write_results_csv(self.all_rows, os.path.join(self.output_folder_results, file_name))
             logger.info("Modified leads successfully saved as CSV to results folder.")
+            return True
 
         except Exception as e:
             logger.error(f"Error saving leads: {e}")
+            return False
+
+    async def read_grid_headers(self):
+        """
+        Read the {col-id: header text} mapping of the rendered grid headers.
+        """
+        data = {}
+        headers = await self.page.query_selector_all('.ag-header-cell')
+        for header in headers:
+            col_id = await header.get_attribute('col-id')
+            header_text = await header.query_selector('span[ref="eText"]')
+            if header_text:
+                header_text = await header_text.inner_text()
+
+            if col_id and header_text:
+                data[col_id] = header_text
+        return data
 
     def custom_options_script(self, total_leads_per_page):
         return f"""
@@ -318,23 +577,150 @@ class ReportScraper:
     """
 
 
-    def auto_next_page_script(self):
-        return """
-        const intervalId = setInterval(() => {
+    def auto_next_page_script(self, skip_pages=0):
+        """
+        Click the next page arrow whenever the grid overlay is empty. If skip_pages is set,
+        the arrow is first clicked that many times as soon as each page has loaded, so that a
+        reloaded report resumes after the last page that was already received.
+        """
+        return f"""
+        const overlaySelector = "#DrillDownTable > div:nth-child(3) > div > div > div > div.ag-root-wrapper-body.ag-layout-normal.ag-focus-managed > div.ag-root.ag-unselectable.ag-layout-normal > div.ag-overlay.ag-hidden > div > div";
+        let pagesToSkip = {skip_pages};
+        const skipIntervalId = setInterval(() => {{
+            const targetElement = document.querySelector(overlaySelector);
+            const clickElement = document.querySelector("#drill-down-table-pagination > div.right-arrow.icon");
+            if (pagesToSkip <= 0) {{
+                clearInterval(skipIntervalId);
+            }} else if (targetElement && targetElement.innerHTML.trim() === "" && clickElement) {{
+                clickElement.click();
+                pagesToSkip--;
+            }}
+        }}, 250);
+
+        const intervalId = setInterval(() => {{
+            if (pagesToSkip > 0) {{
+                return;
+            }}
             const targetElement = document.querySelector("#DrillDownTable > div:nth-child(3) > div > div > div > div.ag-root-wrapper-body.ag-layout-normal.ag-focus-managed > div.ag-root.ag-unselectable.ag-layout-normal > div.ag-overlay.ag-hidden > div > div");
             const clickElement = document.querySelector("#drill-down-table-pagination > div.right-arrow.icon");
 
-            if (targetElement && targetElement.innerHTML.trim() === "" && clickElement) {
+            if (targetElement && targetElement.innerHTML.trim() === "" && clickElement) {{
                 clickElement.click();
-            } else if (!targetElement) {
+            }} else if (!targetElement) {{
                 console.log("Target element not found");
-            } else {
+            }} else {{
                 console.log("Target element is not empty");
-            }
-        }, 2000);
+            }}
+        }}, 2000);
         """
 
+    def render_free_grid_script(self):
+        """
+        Hide the grid body and undo the forced width. With a hidden viewport the grid only keeps
+        a handful of rows in the DOM and Chromium skips their layout and paint, while the
+        pagination and its loading overlay keep working.
+        """
+        return """
+        if (!document.getElementById('render-free-grid')) {
+            const style = document.createElement('style');
+            style.id = 'render-free-grid';
+            style.textContent = `
+                #DrillDownTable .ag-body-viewport,
+                #DrillDownTable .ag-body-horizontal-scroll,
+                #DrillDownTable .ag-floating-top,
+                #DrillDownTable .ag-floating-bottom { display: none !important; }
+            `;
+            document.head.appendChild(style);
+        }
+        document.querySelector('#DrillDownTable > div:last-child > div').style.width = '';
+        """
+
+    async def prepare_report_grid(self, skip_pages=0):
+        """
+        Wait for the drill-down grid to render, widen it so every header is loaded, inject the
+        custom page size and start the auto pagination. Used on first load and after a reload.
+        """
+        await self.page.wait_for_load_state("domcontentloaded") # Wait for dom state to be loaded
+        await self.page.wait_for_selector('div[role="row"][row-index="0"][aria-rowindex="2"][aria-label="Press SPACE to select this row."]',  state='attached')
+
+        total_leads_per_page = str(min(self.total_lead, self.max_leads_per_request))
+        logger.info(f"Fetching {total_leads_per_page} leads per request.")
+
+
+        await self.page.wait_for_selector('[role="rowgroup"] > div:nth-of-type(2)')
+        await self.page.wait_for_selector('[ref="eHeaderContainer"] span[ref="eText"]')
+
+        await self.page.evaluate(
+            """document.querySelector('#DrillDownTable > div:last-child > div').style.width = '999999px';"""
+        )
+
+        if self.render_free:
+            # Read the headers while every column is rendered, then stop rendering the rows
+            await self.page.wait_for_timeout(2000)
+            self.grid_headers = await self.read_grid_headers()
+            await self.page.evaluate(self.render_free_grid_script())
+            logger.info(f"Grid made render-free after reading {len(self.grid_headers)} headers.")
+
+        await self.page.evaluate(self.custom_options_script(total_leads_per_page))
+
+        await self.page.select_option("select#custom-pagination-select", value=total_leads_per_page)
+
+        # Sharded clients are fetched by fetch_shards instead of the grid pagination
+        if not self.sharded:
+            await self.page.evaluate(self.auto_next_page_script(skip_pages))
+
+    async def pagination_watchdog(self):
+        """
+        Watch the drillDownData progress of the current client. If no new page arrives within
+        stall_timeout seconds, reload the report, re-inject the scripts and resume from the last
+        received page. Every stage (the first page, then each following page) gets at most
+        max_stall_retries reloads, after which the client is finished with what was fetched.
+        """
+        loop = asyncio.get_running_loop()
+        self.last_progress_time = loop.time()
+
+        while not self.is_scraping_complete.is_set():
+            idle_time = loop.time() - self.last_progress_time
+            try:
+                await asyncio.wait_for(self.is_scraping_complete.wait(), timeout=max(self.stall_timeout - idle_time, 1))
+                return
+            except asyncio.TimeoutError:
+                pass
+
+            if loop.time() - self.last_progress_time < self.stall_timeout:
+                continue
+
+            stage = "report" if self.pages_received == 0 else f"page {self.pages_received + 1}"
+            self.stall_retries[stage] = self.stall_retries.get(stage, 0) + 1
+
+            # A first-load preparation still waiting for the grid would inject a second pagination
+            if self.prepare_task and not self.prepare_task.done():
+                self.prepare_task.cancel()
+
+            if self.stall_retries[stage] > self.max_stall_retries:
+                logger.error(f"Pagination stalled at {stage} for {self.client_name}, retry budget exhausted.")
+                await self.page.unroute(DRILLDOWN_URL_PATTERN, self.handle_response)
+                if self.all_rows.shape[0]:
+                    logger.warning(f"Saving {self.all_rows.shape[0]}/{self.total_lead} leads fetched before the stall.")
+                    await self.save_leads(self.domain().lower() + "_leads.csv")
+                self.is_scraping_complete.set()
+                return
+
+            logger.warning(
+                f"No new page within {self.stall_timeout}s at {stage}. "
+                f"Reloading report ({self.stall_retries[stage]}/{self.max_stall_retries})..."
+            )
+            try:
+                self.fast_forward_pages = self.pages_received
+                await self.page.reload(wait_until='domcontentloaded')
+                await self.prepare_report_grid(skip_pages=self.pages_received)
+            except Exception as e:
+                logger.error(f"Error reloading the report: {e}")
+
+            self.last_progress_time = loop.time()
+
     async def process_page(self, client_data):
+        from playwright.async_api import expect, TimeoutError as PlaywrightTimeoutError
  
         # Extract the panel link
         self.panel_url = client_data['Panel Link']
@@ -345,20 +731,25 @@ class ReportScraper:
         self.client_name = client_data['Client Name']
         logger.info(f"Processing client: {self.client_name} with panel URL: {self.panel_url}")
 
+        # handle_request sets the event once the master data URL is captured
         try:
-            self.page.on("request", self.handle_request)
+            await self.page.route(MASTERDATA_URL_PATTERN, self.handle_request)
             await self.page.goto(self.panel_url)
-            await self.is_scraping_complete.wait()
-            self.is_scraping_complete.clear()
+            await asyncio.wait_for(self.is_scraping_complete.wait(), timeout=self.stall_timeout)
 
-        except TimeoutError:
+        except (TimeoutError, PlaywrightTimeoutError):
             logger.error("The operation timed out. Refreshing the page.")
             try:
                 await self.page.reload(wait_until='domcontentloaded')
-            except TimeoutError:
-                logger.error("The operation timed out again. Exiting.")
-                self.is_scraping_complete.set()
-                return
+                await asyncio.wait_for(self.is_scraping_complete.wait(), timeout=self.stall_timeout)
+            except (TimeoutError, PlaywrightTimeoutError):
+                logger.error("The operation timed out again.")
+
+        self.is_scraping_complete.clear()
+        if not self.masterdata_url:
+            logger.error(f"The master data of {self.client_name} was not captured. Skipping the client.")
+            self.is_scraping_complete.set()
+            return
 
         await expect(self.page).to_have_title(re.compile(r".*Lead\sManagement\sPlatform.*"))
 
@@ -399,9 +790,11 @@ class ReportScraper:
 
             logger.info("Waiting for the page to load...")
 
+            lead_count_read = False
             try:
                 total_lead_text = await self.page.text_content("#ReportNumberPage > .numberCard-container > div:nth-child(2) .card-count")
                 self.total_lead = int(total_lead_text.strip())
+                lead_count_read = True
                 logger.info(f"Total leads: {self.total_lead}")
             except Exception as e:
                 logger.error(f"Error retrieving total leads: {e}")
@@ -409,79 +802,418 @@ class ReportScraper:
 
             if self.total_lead == 0:
                 logger.info("No leads found for this client.")
+                # An empty tenant is finished, a failed read is not
+                self.client_completed = lead_count_read
                 self.is_scraping_complete.set()
                 return
 
+            self.sharded = bool(self.shard_threshold) and self.total_lead > self.shard_threshold
+
             await self.page.click('#ReportNumberPage > .numberCard-container > div:nth-child(2) .card-right-arrow')
 
             # Report page ~
-            self.page.on("response", self.handle_response)
+            await self.page.route(DRILLDOWN_URL_PATTERN, self.handle_response)
 
-            await self.page.wait_for_load_state("domcontentloaded") # Wait for dom state to be loaded
-            await self.page.wait_for_selector('div[role="row"][row-index="0"][aria-rowindex="2"][aria-label="Press SPACE to select this row."]',  state='attached')
+            # Started before the grid is prepared so that a blank report page is also recovered.
+            # The preparation runs as a task that the watchdog cancels before it reloads the report.
+            self.prepare_task = asyncio.create_task(self.prepare_report_grid())
+            self.watchdog_task = asyncio.create_task(self.pagination_watchdog())
 
-            total_leads_per_page = str(min(self.total_lead, self.max_leads_per_request))
-            logger.info(f"Fetching {total_leads_per_page} leads per request.")
+            await asyncio.wait({self.prepare_task})
+            if not self.prepare_task.cancelled():
+                self.prepare_task.result()
 
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            # Without the watchdog nothing would ever finish this client
+            if not self.watchdog_task:
+                self.is_scraping_complete.set()
+        finally:
+            pass
 
-            await self.page.wait_for_selector('[role="rowgroup"] > div:nth-of-type(2)')
-            await self.page.wait_for_selector('[ref="eHeaderContainer"] span[ref="eText"]')
 
-            await self.page.evaluate(
-                """document.querySelector('#DrillDownTable > div:last-child > div').style.width = '999999px';"""
-            )
-            await self.page.evaluate(self.custom_options_script(total_leads_per_page))
+    def reset_client_state(self):
+        """
+        Reset the state that belongs to the client currently being processed.
+        """
+        import pandas as pd
 
-            await self.page.select_option("select#custom-pagination-select", value=total_leads_per_page)
-            await self.page.evaluate(self.auto_next_page_script())
+        self.context = None
+        self.page = None
+        self.panel_url = None
+        self.masterdata_url = None
+        self.total_lead = 0
+        self.all_rows = pd.DataFrame()
+        self.is_scraping_complete = asyncio.Event()
+        self.pages_received = 0
+        self.last_progress_time = None
+        self.stall_retries = {}
+        self.fast_forward_pages = 0
+        self.watchdog_task = None
+        self.prepare_task = None
+        self.fetch_start = None
+        self.grid_headers = {}
+        self.sharded = False
+        self.shard_task = None
+        self.client_completed = False
+        self.metrics_task = None
+        self.peak_metrics = {}
+
+    async def read_renderer_memory(self):
+        """
+        Return the resident memory in bytes of the browser's renderer processes, or None when
+        psutil is not installed. The renderers are shared by the workers' contexts, so the value
+        is per client only with a single worker.
+        """
+        try:
+            import psutil
+        except ImportError:
+            return None
+
+        if self.browser_session is None:
+            self.browser_session = await self.browser.new_browser_cdp_session()
+        result = await self.browser_session.send("SystemInfo.getProcessInfo")
+
+        memory = 0
+        for process in result["processInfo"]:
+            if process["type"] == "renderer":
+                try:
+                    memory += psutil.Process(process["id"]).memory_info().rss
+                except psutil.Error:
+                    pass
+        return memory
+
+    async def read_page_metrics(self, cdp_session):
+        """
+        Read the Chromium performance metrics of the client page and the renderer memory, to
+        compare the CPU and memory cost per context of the normal and render-free grid modes.
+        """
+        result = await cdp_session.send("Performance.getMetrics")
+        metrics = {metric["name"]: metric["value"] for metric in result["metrics"] if metric["name"] in PAGE_METRICS}
+        if (renderer_memory := await self.read_renderer_memory()) is not None:
+            metrics["RendererMemory"] = renderer_memory
+        return metrics
 
+    async def update_peak_metrics(self, cdp_session):
+        """
+        Take a page metrics sample and keep the peak of every metric in peak_metrics.
+        Returns False when the metrics could not be read.
+        """
+        try:
+            metrics = await self.read_page_metrics(cdp_session)
         except Exception as e:
-            logger.error(f"An unexpected error occurred: {e}")
-        finally:
-            pass
+            logger.warning(f"Could not read page metrics: {e}")
+            return False
 
+        for name, value in metrics.items():
+            self.peak_metrics[name] = max(value, self.peak_metrics.get(name, value))
+        return True
 
-    async def run(self):
-        async with async_playwright() as playwright:
-            self.browser = await playwright.chromium.launch(headless=self.headless, args=[""])
-            logger.info("Browser launched successfully.")
+    async def sample_page_metrics(self, cdp_session):
+        """
+        Sample the page metrics every METRICS_INTERVAL seconds while the client is paginated,
+        as the heap and DOM size peak during pagination rather than when it has finished.
+        """
+        while await self.update_peak_metrics(cdp_session):
+            await asyncio.sleep(METRICS_INTERVAL)
+
+    def spawn_worker(self):
+        """
+        Create a worker sharing the browser, lead store, history and limiter of this scraper
+        but with its own client state, so that several clients can be processed at once.
+        """
+        worker = copy.copy(self)
+        worker.reset_client_state()
+        return worker
+
+    def plan(self):
+        """
+        Plan the run: estimate every client's runtime from the run history and order the
+        clients longest-first across the workers. Returns the ordered jobs, the planned
+        assignment per worker and the estimated makespan in seconds.
+        """
+        jobs = []
+        for index, client_data in enumerate(self.clients):
+            if index in []: # Add the indices of clients to skip
+                logger.warning("Skipping client: " + client_data["Client Name"] + "...")
+                continue
 
-            for index, client_data in self.clients.iterrows():
-                if index in []: # Add the indices of clients to skip
-                    logger.warning("Skipping client: " + client_data["Client Name"] + "...")
-                    continue
+            domain = self.panel_domain(str(client_data["Panel Link"])).lower()
+            jobs.append((self.history.estimate(domain), domain, client_data))
+
+        ordered, assignment, makespan = plan_schedule(jobs, self.workers)
+
+        logger.info(f"Planned {len(ordered)} clients on {self.workers} workers, estimated makespan: {makespan:.0f}s")
+        for worker, worker_jobs in assignment.items():
+            planned = ", ".join(f"{client_data['Client Name']} (~{estimate:.0f}s)" for estimate, _, client_data in worker_jobs)
+            logger.info(f"Worker {worker + 1}: {planned}")
+
+        return ordered, assignment, makespan
+
+    async def throttle_api(self, url):
+        """
+        Wait for the request rate of the backend the given API URL goes to.
+        """
+        await self.limiter.throttle(registrable_domain(urlparse(url).hostname or self.domain()))
+
+    async def work(self, queue):
+        """
+        Take clients from the queue until it is empty, holding a slot of each client's domain.
+        """
+        while not queue.empty():
+            _, domain, client_data = queue.get_nowait()
+
+            # Tenants are subdomains of a shared backend, the slots are per registrable domain
+            async with self.limiter.slot(registrable_domain(domain)):
+                start_time = asyncio.get_running_loop().time()
+                self.fetch_start = datetime.now(timezone.utc).isoformat()
 
                 self.context = await self.browser.new_context()
                 self.context.set_default_timeout(60000)
 
                 self.page = await self.context.new_page()
-
-                await self.process_page(client_data)
-                await self.is_scraping_complete.wait()
-                logger.info(f"Completed processing for client: {client_data['Client Name']}.")
+                cdp_session = await self.context.new_cdp_session(self.page)
+                await cdp_session.send("Performance.enable")
+                self.metrics_task = asyncio.create_task(self.sample_page_metrics(cdp_session))
+
+                try:
+                    await self.process_page(client_data)
+                    await self.is_scraping_complete.wait()
+                    logger.info(f"Completed processing for client: {client_data['Client Name']}.")
+
+                    # A last sample catches the durations accumulated since the previous one
+                    self.metrics_task.cancel()
+                    await self.update_peak_metrics(cdp_session)
+                    metrics = dict(self.peak_metrics)
+                    logger.info(f"Peak page metrics ({'render-free' if self.render_free else 'rendered'} grid): {metrics}")
+
+                    # Clients that stopped early (login, OTP, stall) would make the estimate too short
+                    if self.client_completed:
+                        self.history.record(
+                            domain, asyncio.get_running_loop().time() - start_time, self.total_lead,
+                            metrics=metrics, render_free=self.render_free
+                        )
+                        self.history.save()
+                    else:
+                        logger.warning(f"Not recording the runtime of {client_data['Client Name']}, it did not finish.")
+                except Exception as e:
+                    logger.error(f"Error processing client {client_data['Client Name']}: {e}")
+
+                if self.watchdog_task:
+                    self.watchdog_task.cancel()
+                if self.prepare_task:
+                    self.prepare_task.cancel()
+                if self.metrics_task:
+                    self.metrics_task.cancel()
+                if self.shard_task:
+                    self.shard_task.cancel()
 
                 await self.context.close()
-                self.is_scraping_complete.clear()
-                self.all_rows = pd.DataFrame()
-                
+                self.reset_client_state()
+
+            if not queue.empty():
                 await asyncio.sleep(5)
 
+    async def run(self):
+        from playwright.async_api import async_playwright
+
+        ordered, _, _ = self.plan()
 
-if __name__ == "__main__":
-    ReportScraper.admin_email = "ops.reports@dummy.com"
-    ReportScraper.admin_password = "Cnpj$k)sW43n2Cf!"
-    asyncio.run(
-        ReportScraper(
-            file_path="Extraaedge Clients.xlsx", 
-            output_folder="reports", 
-            max_leads_per_request=1000,
-            headless=False
-        ).run()
+        queue = asyncio.Queue()
+        for job in ordered:
+            queue.put_nowait(job)
+
+        # Create the output folders if they don't exist
+        os.makedirs(self.output_folder, exist_ok=True)
+        os.makedirs(self.output_folder_results, exist_ok=True)
+        logger.info(f"Output folder created at: {self.output_folder}")
+
+        self.lead_store = LeadStore(self.store_path)
+
+        async with async_playwright() as playwright:
+            self.browser = await playwright.chromium.launch(headless=self.headless, args=[""])
+            logger.info("Browser launched successfully.")
+
+            workers = [self.spawn_worker() for _ in range(max(self.workers, 1))]
+            await asyncio.gather(*(worker.work(queue) for worker in workers))
+
+            self.history.save()
+            self.lead_store.close()
+
+        report_metrics(self.history)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape the lead reports of the ExtraaEdge client panels.")
+    parser.add_argument("--file", default="Extraaedge Clients.xlsx", help="Client roster spreadsheet")
+    parser.add_argument("--client", "-c", action="append", default=[],
+                        help="Client name, domain or roster index to process (repeatable, default: all)")
+    parser.add_argument("--list", action="store_true", help="List the clients of the roster and exit")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Summarize the recorded page metrics of the rendered and render-free grid modes and exit")
+    parser.add_argument("--export", action="store_true",
+                        help="Export the stored leads of the selected clients to CSV without scraping and exit")
+    parser.add_argument("--dry-run", action="store_true", help="Show the planned schedule and exit")
+    parser.add_argument("--workers", type=int, default=1, help="Number of clients processed at once")
+    parser.add_argument("--domain-concurrency", type=int, default=4,
+                        help="Clients of the same registrable domain (shared backend) processed at once")
+    parser.add_argument("--domain-rps", type=float, default=8.0, help="API requests per second per registrable domain")
+    parser.add_argument("--headless", action=argparse.BooleanOptionalAction, default=True, help="Run the browser headless")
+    parser.add_argument("--stall-timeout", type=int, default=30,
+                        help="Seconds without a new report page before the report is reloaded")
+    parser.add_argument("--max-stall-retries", type=int, default=2, help="Report reloads allowed per stage")
+    parser.add_argument("--render-free", action="store_true", help="Hide the lead grid so the browser doesn't render the rows")
+    parser.add_argument("--shard-threshold", type=int, default=0,
+                        help="Fetch clients with more leads than this as date range shards (default: off)")
+    parser.add_argument("--shards", type=int, default=8, help="Number of Createdon date ranges of a sharded client")
+    parser.add_argument("--shard-concurrency", type=int, default=4, help="Shards of a client fetched at once")
+    parser.add_argument("--shard-start-date", default="2015-01-01",
+                        help="Start of the dated shards (YYYY-MM-DD), older leads are fetched as one open-ended shard")
+    parser.add_argument("--shard-retries", type=int, default=2, help="Retries of a failed shard")
+    parser.add_argument("--max-leads-per-request", type=int, default=1000, help="Leads fetched per report page")
+    parser.add_argument("--output", default="reports", help="Folder of the full lead CSV exports")
+    parser.add_argument("--results", default="results", help="Folder of the modified lead CSV exports")
+    parser.add_argument("--store", default="leads.db", help="Path of the local lead store")
+    parser.add_argument("--admin-email", default=os.environ.get("ADMIN_EMAIL"), help="OTP mailbox (default: $ADMIN_EMAIL)")
+    parser.add_argument("--admin-password", default=os.environ.get("ADMIN_PASSWORD"), help="OTP mailbox password (default: $ADMIN_PASSWORD)")
+    return parser.parse_args(argv)
+
+def select_clients(clients, selectors):
+    """
+    Return the roster rows matching any of the given client names, domains or indices.
+    """
+    if not selectors:
+        return clients
+
+    wanted = {selector.strip().lower() for selector in selectors}
+    return [
+        client_data for index, client_data in enumerate(clients)
+        if str(index) in wanted
+        or str(client_data["Client Name"]).strip().lower() in wanted
+        or (ReportScraper.panel_domain(str(client_data["Panel Link"])) or "").lower() in wanted
+    ]
+
+def report_metrics(history):
+    """
+    Log the median peak page metrics of the runs recorded in each grid mode next to each other.
+    """
+    summary = history.metrics_summary()
+    if not summary:
+        logger.info("No page metrics recorded yet.")
+        return
+
+    modes = ("rendered", "render_free")
+    names = ["Runs"] + sorted({name for mode_summary in summary.values() for name in mode_summary} - {"Runs"})
+    lines = [f"{'metric':<22}" + "".join(f"{mode:>16}" for mode in modes)]
+    for name in names:
+        values = [summary.get(mode, {}).get(name) for mode in modes]
+        lines.append(f"{name:<22}" + "".join(f"{value:>16.2f}" if value is not None else f"{'-':>16}" for value in values))
+    logger.info("Median peak page metrics per grid mode:\n" + "\n".join(lines))
+
+def export_leads(clients, store_path, output_folder):
+    """
+    Write every stored lead of the selected clients, across all runs, to <domain>_stored_leads.csv
+    in the output folder. The master data ids are decoded with the master data saved by the last
+    run of the domain; without it the raw ids are written to <domain>_raw_leads.csv instead.
+    The columns are the report keys, the grid header texts are only known while scraping.
+    """
+    if not os.path.exists(store_path):
+        logger.error(f"No lead store found at {store_path}.")
+        return 1
+
+    os.makedirs(output_folder, exist_ok=True)
+    lead_store = LeadStore(store_path)
+    try:
+        for domain in dict.fromkeys(ReportScraper.panel_domain(str(client_data["Panel Link"])).lower() for client_data in clients):
+            if not lead_store.count_leads(domain):
+                logger.warning(f"No stored leads for {domain}.")
+                continue
+
+            masterdata_path = f"master/masterdata_{domain}.json"
+            if not os.path.exists(masterdata_path):
+                logger.warning(f"No saved master data for {domain}, exporting the raw master data ids.")
+                file_path = os.path.join(output_folder, f"{domain}_raw_leads.csv")
+                exported = lead_store.export_csv(domain, file_path)
+                logger.info(f"Exported {exported} stored leads of {domain} to {file_path}.")
+                continue
+
+            import pandas as pd
+            from processing import decode_masterdata, sanitize_newlines, write_stored_leads_csv
+
+            with open(masterdata_path, "r") as f:
+                masterdata = json.load(f)
+            all_rows = decode_masterdata(pd.DataFrame(lead_store.load_leads(domain)), masterdata, fields_dict)
+
+            file_path = os.path.join(output_folder, f"{domain}_stored_leads.csv")
+            write_stored_leads_csv(sanitize_newlines(all_rows), file_path)
+            logger.info(f"Exported {all_rows.shape[0]} stored leads of {domain} to {file_path}.")
+    finally:
+        lead_store.close()
+    return 0
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.metrics:
+        report_metrics(RunHistory())
+        return 0
+
+    roster = load_clients(args.file)
+    clients = select_clients(roster, args.client)
+    if not clients:
+        logger.error("No client matches the selection.")
+        return 1
+
+    if args.list:
+        roster_index = {id(client_data): index for index, client_data in enumerate(roster)}
+        for client_data in clients:
+            print(f"{roster_index[id(client_data)]:>4}  {client_data['Client Name']}  {client_data['Panel Link']}")
+        return 0
+
+    if args.export:
+        return export_leads(clients, args.store, args.output)
+
+    scraper = ReportScraper(
+        file_path=args.file,
+        output_folder=args.output,
+        results_folder=args.results,
+        store_path=args.store,
+        max_leads_per_request=args.max_leads_per_request,
+        headless=args.headless,
+        stall_timeout=args.stall_timeout,
+        max_stall_retries=args.max_stall_retries,
+        workers=args.workers,
+        domain_concurrency=args.domain_concurrency,
+        domain_requests_per_second=args.domain_rps,
+        clients=clients,
+        render_free=args.render_free,
+        shard_threshold=args.shard_threshold,
+        shards=args.shards,
+        shard_concurrency=args.shard_concurrency,
+        shard_start_date=args.shard_start_date,
+        shard_retries=args.shard_retries
     )
 
+    if args.dry_run:
+        scraper.plan()
+        return 0
+
+    if not (args.admin_email and args.admin_password):
+        logger.error("The OTP mailbox credentials are required, set --admin-email and --admin-password.")
+        return 1
+
+    ReportScraper.admin_email = args.admin_email
+    ReportScraper.admin_password = args.admin_password
+    asyncio.run(scraper.run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
 # Existing Issues:
 # The script is unable to correctly inject the custom options—this may be due to the page not being fully loaded. (fixed)
 # The script sometimes shows an OTP error even when the OTP is correct and the page has loaded. (semi-fixed)
 # Sometimes the report page stays blank—consider implementing a script to auto-refresh the page 
-# and re-inject all JavaScript if the content does not load. (semi-fixed)
+# and re-inject all JavaScript if the content does not load. (fixed, see pagination_watchdog)
 
@@ -0,0 +1,104 @@
+import csv
+
+import pandas as pd
+
+# Columns of the modified leads CSV saved to the results folder
+RESULT_COLUMNS = ['super_camp_id', 'Mobile', 'Email', 'feedback_id', 'comment']
+
+def accumulate_rows(all_rows, report_data):
+    """
+    Append a drillDownData page to the fetched leads, dropping duplicate rows.
+    """
+    new_rows = pd.DataFrame(report_data)
+    return pd.concat([all_rows, new_rows], ignore_index=True).drop_duplicates()
+
+def merge_shards(shard_rows):
+    """
+    Merge the reportData rows of every shard, keeping the last copy of each lead Id.
+    """
+    merged = pd.DataFrame([row for rows in shard_rows for row in rows])
+    if merged.empty:
+        return merged
+    return merged.drop_duplicates(subset="Id", keep="last", ignore_index=True)
+
+def group_masterdata(data):
+    """
+    Group the raw MasterData/all response into {key: {id: name}} lookups.
+    """
+    grouped_data = {}
+    for key, value in data.items():
+        str_key = str(key)
+        if isinstance(value, list):
+            grouped_data[str_key] = {}
+            for item in value:
+                if isinstance(item, dict):
+                    grouped_data[str_key][str(item.get("id"))] = str(item.get("name"))
+                else:
+                    grouped_data[str_key][str(item)] = None  # Convert item to string
+        else:
+            grouped_data[str_key] = str(value)
+    return grouped_data
+
+def decode_masterdata(all_rows, masterdata, map_fields):
+    """
+    Replace the (comma separated) master data ids of the mapped fields with their names.
+    """
+    for key in all_rows.columns:
+        all_rows[key] = all_rows[key].astype(str)
+
+    for index, row in all_rows.iterrows():
+        for key, value in row.items():
+            if apiKey := map_fields.get(key):
+                master_value = masterdata.get(apiKey)
+                if master_value is not None:
+                    ids = [id.strip() for id in str(value).split(',') if id.strip()]
+                    corresponding_values = []
+                    for id in ids:
+                        master_val = master_value.get(id)
+                        if master_val is not None:
+                            corresponding_values.append(master_val)
+                    result = ', '.join(corresponding_values)
+                    if result:
+                        all_rows.at[index, key] = result
+
+    for column in all_rows.columns:
+        if column in masterdata:
+            all_rows[column] = all_rows[column].map(masterdata[column])
+
+    return all_rows
+
+def sanitize_newlines(all_rows):
+    """
+    Escape the line breaks of every string value so that each lead stays on one CSV line.
+    """
+    return all_rows.apply(
+        lambda x: x.map(
+            lambda y: str(y).replace('\r\n', '\\n').replace('\r', '\\n').replace('\n', '\\n') if isinstance(y, str) else y
+        )
+    )
+
+def write_leads_csv(all_rows, headers, file_path):
+    """
+    Save the leads with the grid header texts as column names. The headers are a {col-id: text}
+    mapping, the columns are aligned by col-id so that leads stored by earlier runs with other
+    report fields still line up. Only when the col-ids don't match the report keys are the
+    columns labelled by position.
+    """
+    if set(headers).issubset(all_rows.columns):
+        all_rows = all_rows.reindex(columns=list(headers))
+    all_rows.set_axis(list(headers.values()), axis=1).to_csv(file_path, index=False, quoting=csv.QUOTE_ALL, encoding='utf-8')
+
+def write_stored_leads_csv(all_rows, file_path):
+    """
+    Save the leads of the lead store with their report keys as column names.
+    """
+    all_rows.to_csv(file_path, index=False, quoting=csv.QUOTE_ALL, encoding='utf-8')
+
+def write_results_csv(all_rows, file_path):
+    """
+    Save the modified leads, only keeping the RESULT_COLUMNS with empty feedback fields.
+    """
+    results = all_rows.assign(feedback_id='', comment='', super_camp_id='')
+    results = results.rename(columns={'MobileNumber': 'Mobile'})[RESULT_COLUMNS]
+    results.to_csv(file_path, index=False, quoting=csv.QUOTE_ALL, encoding='utf-8')
+    return results
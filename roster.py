@@ -0,0 +1,51 @@
+import os
+import pickle
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+def cache_path_for(file_path: str) -> str:
+    """
+    Return the path of the roster cache kept next to the given spreadsheet.
+    """
+    directory, name = os.path.split(file_path)
+    return os.path.join(directory, f".{name}.roster.pickle")
+
+def load_clients(file_path: str, cache_path: str = None) -> list:
+    """
+    Load the client roster from the spreadsheet as a list of row dicts.
+    The parsed roster is cached in a pickle file that is invalidated whenever the
+    spreadsheet's mtime or size changes, so pandas and openpyxl are only imported
+    when the spreadsheet has actually been edited.
+    """
+    cache_path = cache_path or cache_path_for(file_path)
+    stat = os.stat(file_path)
+    signature = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+        if cached.get("signature") == signature:
+            return cached["clients"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable roster cache {cache_path}: {e}")
+
+    import pandas as pd
+
+    clients_df = pd.read_excel(file_path)
+    clients = [
+        {key: (None if pd.isna(value) else value) for key, value in row.items()}
+        for row in clients_df.to_dict("records")
+    ]
+
+    try:
+        with open(cache_path, "wb") as f:
+            pickle.dump({"signature": signature, "clients": clients}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        logger.warning(f"Could not write roster cache {cache_path}: {e}")
+
+    return clients
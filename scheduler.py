@@ -0,0 +1,161 @@
+import os
+import json
+import heapq
+import asyncio
+import statistics
+import logging
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+# Second-level labels under which a country code TLD registers domains, e.g. college.ac.in
+SECOND_LEVEL_LABELS = {"ac", "co", "com", "edu", "gov", "net", "org"}
+
+def registrable_domain(host: str) -> str:
+    """
+    Return the registrable domain of a host, e.g. extraaedge.com for tenant.extraaedge.com,
+    so that tenants hosted on the same backend share their limits.
+    """
+    labels = (host or "").lower().rstrip(".").split(".")
+    if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+class RunHistory:
+
+    def __init__(self, file_path: str = "run_history.json", default_runtime: float = 120.0, smoothing: float = 0.5,
+                 max_samples: int = 20):
+        """
+        Load the per-domain runtime and lead count recorded by previous runs.
+        New measurements are blended into the stored values with the given smoothing factor,
+        and domains without history are estimated from the median of the known runtimes.
+        The page metrics of the last max_samples runs are kept per domain and grid mode.
+        """
+        self.file_path = file_path
+        self.default_runtime = default_runtime
+        self.smoothing = smoothing
+        self.max_samples = max_samples
+        self.records = {}
+
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, "r") as f:
+                    self.records = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable run history {file_path}: {e}")
+
+    def estimate(self, domain: str) -> float:
+        """
+        Return the expected runtime in seconds for the given domain.
+        """
+        if record := self.records.get(domain):
+            return record["runtime"]
+
+        runtimes = sorted(record["runtime"] for record in self.records.values())
+        if not runtimes:
+            return self.default_runtime
+        return runtimes[len(runtimes) // 2]
+
+    def record(self, domain: str, runtime: float, leads: int, metrics: dict = None, render_free: bool = False):
+        """
+        Blend the runtime and lead count of a finished client into its history.
+        The page metrics of the run are appended to the samples of its grid mode so that both
+        modes can be compared.
+        """
+        if record := self.records.get(domain):
+            record["runtime"] = self.smoothing * runtime + (1 - self.smoothing) * record["runtime"]
+            record["leads"] = leads
+            record["runs"] += 1
+        else:
+            record = self.records[domain] = {"runtime": runtime, "leads": leads, "runs": 1}
+
+        if metrics:
+            mode_metrics = record.setdefault("metrics", {})
+            mode = "render_free" if render_free else "rendered"
+            # Histories written before the samples were kept hold a single dict per mode
+            if isinstance(mode_metrics.get(mode), dict):
+                mode_metrics[mode] = [mode_metrics[mode]]
+            samples = mode_metrics.setdefault(mode, [])
+            samples.append(metrics)
+            del samples[:-self.max_samples]
+
+    def metrics_summary(self) -> dict:
+        """
+        Return the number of runs and the median of every page metric per grid mode, across all domains.
+        """
+        samples = {}
+        for record in self.records.values():
+            for mode, mode_samples in record.get("metrics", {}).items():
+                # Histories written before the samples were kept hold a single dict per mode
+                if isinstance(mode_samples, dict):
+                    mode_samples = [mode_samples]
+                samples.setdefault(mode, []).extend(mode_samples)
+
+        summary = {}
+        for mode, mode_samples in samples.items():
+            names = {name for sample in mode_samples for name in sample}
+            summary[mode] = {"Runs": len(mode_samples)}
+            for name in names:
+                summary[mode][name] = statistics.median(sample[name] for sample in mode_samples if name in sample)
+        return summary
+
+    def save(self):
+        with open(self.file_path, "w") as f:
+            json.dump(self.records, f, indent=4)
+
+
+class DomainLimiter:
+
+    def __init__(self, max_concurrency: int = 1, requests_per_second: float = 2.0):
+        """
+        Limit how many clients of the same domain run at once and how fast API requests are
+        sent to it, so that tenants sharing a CRM backend are not overloaded. Callers key the
+        limits by registrable domain.
+        """
+        self.max_concurrency = max_concurrency
+        self.min_interval = 1 / requests_per_second if requests_per_second else 0
+        self.semaphores = {}
+        self.locks = {}
+        self.next_request_time = {}
+
+    @asynccontextmanager
+    async def slot(self, domain: str):
+        """
+        Hold one of the concurrent client slots of the given domain.
+        """
+        semaphore = self.semaphores.setdefault(domain, asyncio.Semaphore(self.max_concurrency))
+        async with semaphore:
+            yield
+
+    async def throttle(self, domain: str):
+        """
+        Wait until the next request to the given domain is allowed by the request rate.
+        """
+        if not self.min_interval:
+            return
+
+        loop = asyncio.get_running_loop()
+        async with self.locks.setdefault(domain, asyncio.Lock()):
+            delay = self.next_request_time.get(domain, 0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_request_time[domain] = loop.time() + self.min_interval
+
+
+def plan_schedule(jobs: list, workers: int) -> tuple:
+    """
+    Order the jobs longest-first and assign each one to the least loaded worker.
+    Jobs are (estimated_runtime, domain, payload) tuples. Returns the ordered jobs,
+    the planned assignment per worker and the estimated makespan in seconds.
+    """
+    ordered = sorted(jobs, key=lambda job: job[0], reverse=True)
+    loads = [(0.0, worker) for worker in range(max(workers, 1))]
+    assignment = {worker: [] for _, worker in loads}
+
+    for job in ordered:
+        load, worker = heapq.heappop(loads)
+        assignment[worker].append(job)
+        heapq.heappush(loads, (load + job[0], worker))
+
+    makespan = max(load for load, _ in loads)
+    return ordered, assignment, makespan